@@ -1,5 +1,10 @@
+import os
+import sys
+
 from pylab import *
 
+from exhibit_log import ResultLog
+
 ######################  bibliography  ###########################
 """
 ASCII Art Archive. (2019). Space. Retrieved from https://www.asciiart.eu/space
@@ -282,6 +287,10 @@ dist_Earth_sun = 149597870
 # Define constant to allow user to continuously search for exoplanets (step 11)
 searching = True
 
+# Record every search in a local log so usage can be analysed across kiosks
+result_log = ResultLog(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "exhibit_results"))
+
 # Images for user interaction (ASCII Art Archive, 2019)
 ascii_spaceship = """
 
@@ -521,7 +530,9 @@ if patron_type == 1:
         print("--Now let's see if we can find your planet--\n"
               "\nTo find your planet we need to see a certain amount of change in the light of your planet's sun as your planet blocks it."
               "\nOnce we know if the change is enough, we need to watch it go around its sun at least 3 times to be sure.")
-        if get_detection(min_rel_intensity):
+        detect_time = None
+        detected = get_detection(min_rel_intensity)
+        if detected:
             # Planet found - intensity decreased enough
             print("\nA: Yay, we found your planet!!!")
             # convert period from seconds to years and multiply by 3 years
@@ -530,6 +541,10 @@ if patron_type == 1:
         else:
             print("\nA: Sorry...We couldn't find your planet")
 
+        # Record the search in the result log (written in the background)
+        result_log.append(patron_type, c, user_size, user_dist, period, transit_time,
+                          min_rel_intensity, detected, detect_time)
+
         # Step 11 - Ask user if they want to search again
         print(ascii_space)
         searching = search_again()
@@ -667,7 +682,9 @@ else:
         print("\n--Let's see if we can detect your planet--\n"
               "\nThe detection limit to find a planet is an intensity decrease of 1 part in 10,000 as the exoplanet transits the star."
               "\nTo confirm the existence of an exoplanet multiple measurements at regular intervals (at least 3 periods) can be used.")
-        if get_detection(min_rel_intensity):
+        detect_time = None
+        detected = get_detection(min_rel_intensity)
+        if detected:
             # Planet found - intensity decreased enough
             print("\nA: We detected your planet!!!"
                   "\nThis means the intensity decreased enough to find it.")
@@ -679,6 +696,10 @@ else:
             print("\nA: Sorry...we couldn't detect your planet."
                   "\nThis means intensity didn't decrease enough to find it.")
 
+        # Record the search in the result log (written in the background)
+        result_log.append(patron_type, c, user_size, user_dist, period, transit_time,
+                          min_rel_intensity, detected, detect_time)
+
         # Step 11 - Ask user if they want to try again
         print(ascii_space)
         searching = search_again()
@@ -688,4 +709,11 @@ print("\nWelcome back to Earth!"
       "\n"
       "\nContinue to enjoy your adventure of exploring the wonders of our galaxy."      
       "\nAnd don't forget to keep your eyes open for any UFO's.",
-      ascii_rocket_landed)
\ No newline at end of file
+      ascii_rocket_landed)
+
+# Write any searches still buffered in the result log. A failed write is only
+# reported for the exhibit staff, the patron's visit is already over.
+try:
+    result_log.close()
+except Exception as error:
+    sys.stderr.write("Searches could not be saved to the result log: %s\n" % error)
\ No newline at end of file
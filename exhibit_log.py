@@ -0,0 +1,342 @@
+""" Append-only columnar result log for the 'Exploring Our Galaxy' exhibit.
+
+Every exoplanet search at a kiosk is recorded as one row. Rows are buffered in
+memory and handed to a background thread in batches (or after a short delay)
+so writing to disk never slows down the interactive loop.
+
+A log is a directory containing:
+    <column>.col   one file per column, a headerless array of fixed-width
+                   little-endian values that can be memory-mapped directly
+    index.bin      a small header followed by one fixed-width entry per batch
+                   (first row, number of rows, first and last timestamp)
+
+The index entry for a batch is written only after all of its columns, so a
+reader never sees a half-written batch.
+"""
+
+import atexit
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+from numpy import count_nonzero, dtype, histogram, logspace, memmap, zeros
+
+######################  log format ###########################
+
+# Column name and struct format of each value (d = 8 byte float, B = 1 byte)
+COLUMNS = (
+    ("timestamp", "d"),  # time of the search [s since epoch]
+    ("patron_type", "d"),  # 1 = rookie, 0 = enthusiast
+    ("c", "d"),  # proportion guessed for the drake equation
+    ("user_size", "d"),  # size of exoplanet relative to Earth
+    ("user_dist", "d"),  # distance from star relative to Earth and the sun
+    ("period", "d"),  # [s]
+    ("transit_time", "d"),  # [s]
+    ("min_rel_intensity", "d"),
+    ("detected", "B"),  # 1 if the exoplanet could be detected
+    ("detect_time", "d"),  # [years], nan if not detected
+)
+COLUMN_NAMES = tuple(name for name, fmt in COLUMNS)
+
+INDEX_MAGIC = b"EOGLOG01"
+INDEX_HEADER = struct.Struct("<8sI")  # magic, number of columns
+INDEX_ENTRY = struct.Struct("<QQdd")  # first row, rows, first time, last time
+INDEX_FILE = "index.bin"
+
+# Half-decade bins for drake guesses of c, from 1 in 100,000 planets to all of
+# them. Rookie guesses are out of 10,000 so start at 0.0001.
+DRAKE_BINS = logspace(-5, 0, 11)
+
+
+def _column_path(path, name):
+    """Return the file path of a column in the log directory.
+
+    Parameters:
+        path (str): Directory of the log
+        name (str): Name of the column
+    Return:
+        str: Path of the column file
+    """
+    return os.path.join(path, name + ".col")
+
+
+def _drop_unindexed(path, n_entries, n_rows):
+    """Truncate the index and column files to what the index covers, dropping
+    anything left by an interrupted or failed write. Files are only ever
+    shortened, a column shorter than the index means rows have been lost.
+
+    Parameters:
+        path (str): Directory of the log
+        n_entries (int): Number of complete index entries
+        n_rows (int): Number of rows covered by the index
+    """
+    sizes = [(os.path.join(path, INDEX_FILE),
+              INDEX_HEADER.size + n_entries * INDEX_ENTRY.size)]
+    for name, fmt in COLUMNS:
+        sizes.append((_column_path(path, name),
+                      n_rows * struct.calcsize("<" + fmt)))
+    for file_path, size in sizes:
+        actual = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        if actual < size:
+            raise ValueError("%s is shorter than the log's index" % file_path)
+    for file_path, size in sizes:
+        with open(file_path, "ab") as file:
+            if file.tell() > size:
+                file.truncate(size)
+
+
+######################  writing ###########################
+
+class ResultLog:
+    """Buffer search results in memory and append them to disk in batches."""
+
+    def __init__(self, path, batch_size=16, max_delay=5.0):
+        """Open (or create) the log in the directory path.
+
+        Parameters:
+            path (str): Directory of the log
+            batch_size (int): Number of rows buffered before a write
+            max_delay (flt): Longest time rows wait in the buffer [s]
+        """
+        self._path = path
+        self._batch_size = batch_size
+        self._max_delay = max_delay
+        self._rows = []
+        self._lock = threading.Lock()
+        self._batches = queue.Queue()
+        self._closed = False
+        self._error = None
+
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            with open(index_path, "wb") as index:
+                index.write(INDEX_HEADER.pack(INDEX_MAGIC, len(COLUMNS)))
+        entries, self._next_row = _read_index(path)
+        self._n_entries = len(entries)
+        _drop_unindexed(path, self._n_entries, self._next_row)
+
+        self._writer = threading.Thread(target=self._write_batches, daemon=True)
+        self._writer.start()
+        atexit.register(self._close_at_exit)
+
+    def append(self, patron_type, c, user_size, user_dist, period,
+               transit_time, min_rel_intensity, detected, detect_time):
+        """Record the inputs and outputs of one exoplanet search. This only
+        adds to the in-memory buffer, the disk write happens off this thread.
+
+        Parameters:
+            patron_type (flt): 1 for a rookie, 0 for an enthusiast
+            c (flt): Proportion guessed for the drake equation
+            user_size (flt): Size of the exoplanet relative to Earth
+            user_dist (flt): Distance of the exoplanet relative to Earth
+            period (flt): The period of the exoplanet [s]
+            transit_time (flt): The transit time of the exoplanet [s]
+            min_rel_intensity (flt): Minimum relative intensity of the star
+            detected (bool): Whether the exoplanet could be detected
+            detect_time (flt): Time to confirm the exoplanet [years], only
+                used if the exoplanet was detected
+        """
+        row = (time.time(), patron_type, c, user_size, user_dist, period,
+               transit_time, min_rel_intensity, int(bool(detected)),
+               detect_time if detected else float("nan"))
+        with self._lock:
+            if self._closed:
+                raise ValueError("result log is closed")
+            self._rows.append(row)
+            if len(self._rows) >= self._batch_size:
+                self._hand_off()
+
+    def flush(self):
+        """Write all buffered rows and wait until they are on disk. Raises the
+        first error the writer thread hit since the last flush or close.
+        """
+        with self._lock:
+            self._hand_off()
+        self._batches.join()
+        self._raise_error()
+
+    def close(self):
+        """Flush the remaining rows and stop the writer thread. Raises the
+        first error the writer thread hit since the last flush.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._hand_off()
+            self._batches.put(None)
+        self._writer.join()
+        atexit.unregister(self._close_at_exit)
+        self._raise_error()
+
+    def _close_at_exit(self):
+        """Close the log when the program exits. There is no caller left to
+        handle a write error, so it is reported on stderr instead of raised.
+        """
+        try:
+            self.close()
+        except Exception as error:
+            sys.stderr.write("Result log %s could not be saved: %s\n"
+                             % (self._path, error))
+
+    def _raise_error(self):
+        """Raise (and clear) the error recorded by the writer thread."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _hand_off(self):
+        """Pass the buffered rows to the writer thread. Caller holds the lock."""
+        if self._rows:
+            self._batches.put(self._rows)
+            self._rows = []
+
+    def _write_batches(self):
+        """Writer thread: append each batch to the column files then index it.
+        Rows left in the buffer for max_delay are handed off here. A failed
+        batch is recorded for flush or close to raise, and the thread keeps
+        serving the queue so flush never waits on a dead thread.
+        """
+        while True:
+            try:
+                rows = self._batches.get(timeout=self._max_delay)
+            except queue.Empty:
+                with self._lock:
+                    self._hand_off()
+                continue
+            try:
+                if rows is None:
+                    return
+                self._write_batch(rows)
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+                try:
+                    _drop_unindexed(self._path, self._n_entries, self._next_row)
+                except Exception:
+                    pass
+            finally:
+                self._batches.task_done()
+
+    def _write_batch(self, rows):
+        """Append a batch of rows to the column files and the index.
+
+        Parameters:
+            rows (list): Tuples of values in the order of COLUMNS
+        """
+        for i, (name, fmt) in enumerate(COLUMNS):
+            values = [row[i] for row in rows]
+            with open(_column_path(self._path, name), "ab") as column:
+                column.write(struct.pack("<%d%s" % (len(values), fmt), *values))
+                column.flush()
+                os.fsync(column.fileno())
+        with open(os.path.join(self._path, INDEX_FILE), "ab") as index:
+            index.write(INDEX_ENTRY.pack(self._next_row, len(rows),
+                                         rows[0][0], rows[-1][0]))
+            index.flush()
+            os.fsync(index.fileno())
+        self._n_entries = self._n_entries + 1
+        self._next_row = self._next_row + len(rows)
+
+
+######################  reading ###########################
+
+def _read_index(path):
+    """Read the batch entries of a log's index.
+
+    Parameters:
+        path (str): Directory of the log
+    Return:
+        tuple: (list of (first row, rows, first time, last time), total rows)
+    """
+    with open(os.path.join(path, INDEX_FILE), "rb") as index:
+        data = index.read()
+    magic, n_columns = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or n_columns != len(COLUMNS):
+        raise ValueError("%s is not an exhibit result log" % path)
+    body = data[INDEX_HEADER.size:]
+    # Ignore a trailing partial entry from an interrupted write
+    usable = len(body) - len(body) % INDEX_ENTRY.size
+    entries = list(INDEX_ENTRY.iter_unpack(body[:usable]))
+    total = entries[-1][0] + entries[-1][1] if entries else 0
+    return entries, total
+
+
+class ResultLogReader:
+    """Memory-map the columns of a result log for fast aggregation."""
+
+    def __init__(self, path):
+        """Open the log in the directory path. Only rows covered by the index
+        are visible, so rows still being written are never read.
+
+        Parameters:
+            path (str): Directory of the log
+        """
+        self._path = path
+        self.batches, self.rows = _read_index(path)
+
+    def __len__(self):
+        """Return the number of indexed rows (searches) in the log."""
+        return self.rows
+
+    def column(self, name):
+        """Return a read-only, memory-mapped array of a column.
+
+        Parameters:
+            name (str): Name of the column, one of COLUMN_NAMES
+        Return:
+            array: Values of the column for every indexed row
+        """
+        fmt = dict(COLUMNS)[name]
+        column_dtype = dtype("<f8") if fmt == "d" else dtype("u1")
+        if self.rows == 0:
+            return zeros(0, dtype=column_dtype)
+        return memmap(_column_path(self._path, name), dtype=column_dtype,
+                      mode="r", shape=(self.rows,))
+
+    def rows_between(self, start, end):
+        """Find the rows recorded between two times using the batch index,
+        without reading the timestamp column.
+
+        Parameters:
+            start (flt): Earliest time [s since epoch]
+            end (flt): Latest time [s since epoch]
+        Return:
+            slice: Rows of batches that overlap the times
+        """
+        first = last = None
+        for first_row, n_rows, first_time, last_time in self.batches:
+            if last_time >= start and first_time <= end:
+                if first is None:
+                    first = first_row
+                last = first_row + n_rows
+        if first is None:
+            return slice(0, 0)
+        return slice(first, last)
+
+
+def drake_histogram(paths, bins=DRAKE_BINS):
+    """Count the drake equation guesses (c) made across one or more kiosks.
+    Each log is counted separately and the counts summed, so the memory-mapped
+    columns are never copied into one array. Guesses outside the bins (such as
+    0, or more than 10,000 out of 10,000 planets) are counted, not dropped.
+
+    Parameters:
+        paths (list): Directories of the logs to combine
+        bins (flt array): Increasing bin edges, log-spaced by default
+    Return:
+        tuple: (counts array, bin edges array, number below the first edge,
+            number above the last edge)
+    """
+    counts = zeros(len(bins) - 1, dtype=int)
+    below = above = 0
+    for path in paths:
+        guesses = ResultLogReader(path).column("c")
+        counts = counts + histogram(guesses, bins=bins)[0]
+        below = below + int(count_nonzero(guesses < bins[0]))
+        above = above + int(count_nonzero(guesses > bins[-1]))
+    return counts, bins, below, above
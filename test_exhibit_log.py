@@ -0,0 +1,151 @@
+import math
+import os
+import time
+
+import pytest
+
+from exhibit_log import (COLUMN_NAMES, DRAKE_BINS, INDEX_FILE, ResultLog,
+                         ResultLogReader, drake_histogram)
+
+
+def _search(log, c, detected=True):
+    """Append one search with a known drake guess to a log."""
+    log.append(1, c, 1, 1, 31536000.0, 46380.0, 0.99, detected,
+               3.0 if detected else None)
+
+
+def test_append_flush_and_read_columns(tmp_path):
+    log = ResultLog(str(tmp_path), batch_size=2)
+    _search(log, 0.1)
+    _search(log, 0.2, detected=False)
+    _search(log, 0.3)
+    log.flush()
+
+    reader = ResultLogReader(str(tmp_path))
+    assert len(reader) == 3
+    assert [len(reader.column(name)) for name in COLUMN_NAMES] == [3] * len(COLUMN_NAMES)
+    assert list(reader.column("c")) == [0.1, 0.2, 0.3]
+    assert list(reader.column("detected")) == [1, 0, 1]
+    detect_time = reader.column("detect_time")
+    assert detect_time[0] == 3.0 and math.isnan(detect_time[1])
+    # One full batch of two rows and one flushed batch of one row
+    assert [entry[:2] for entry in reader.batches] == [(0, 2), (2, 1)]
+    log.close()
+
+
+def test_rows_are_handed_off_after_max_delay(tmp_path):
+    log = ResultLog(str(tmp_path), batch_size=100, max_delay=0.05)
+    _search(log, 0.1)
+    deadline = time.time() + 5
+    while len(ResultLogReader(str(tmp_path))) == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(ResultLogReader(str(tmp_path))) == 1
+    log.close()
+
+
+def test_reopen_appends_after_existing_rows(tmp_path):
+    log = ResultLog(str(tmp_path))
+    _search(log, 0.1)
+    log.close()
+    log = ResultLog(str(tmp_path))
+    _search(log, 0.2)
+    log.close()
+
+    reader = ResultLogReader(str(tmp_path))
+    assert list(reader.column("c")) == [0.1, 0.2]
+    assert [entry[:2] for entry in reader.batches] == [(0, 1), (1, 1)]
+
+
+@pytest.mark.parametrize("junk_file", ["c.col", "detected.col", INDEX_FILE])
+def test_reopen_drops_unindexed_junk(tmp_path, junk_file):
+    log = ResultLog(str(tmp_path))
+    _search(log, 0.1)
+    log.close()
+    # Simulate a write interrupted part way through a column or index entry
+    with open(os.path.join(str(tmp_path), junk_file), "ab") as file:
+        file.write(b"\x07" * 5)
+    assert list(ResultLogReader(str(tmp_path)).column("c")) == [0.1]
+
+    log = ResultLog(str(tmp_path))
+    _search(log, 0.2)
+    log.close()
+    reader = ResultLogReader(str(tmp_path))
+    assert list(reader.column("c")) == [0.1, 0.2]
+    assert list(reader.column("detected")) == [1, 1]
+
+
+def test_reopen_rejects_column_shorter_than_index(tmp_path):
+    log = ResultLog(str(tmp_path))
+    _search(log, 0.1)
+    log.close()
+    os.remove(os.path.join(str(tmp_path), "c.col"))
+
+    with pytest.raises(ValueError):
+        ResultLog(str(tmp_path))
+    # The missing column was not recreated as padding
+    assert not os.path.exists(os.path.join(str(tmp_path), "c.col"))
+
+
+def test_write_error_is_raised_and_writer_keeps_running(tmp_path, monkeypatch):
+    log = ResultLog(str(tmp_path), batch_size=1)
+    write_batch = log._write_batch
+
+    def failing_write_batch(rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(log, "_write_batch", failing_write_batch)
+    _search(log, 0.1)
+    with pytest.raises(OSError):
+        log.flush()
+
+    monkeypatch.setattr(log, "_write_batch", write_batch)
+    _search(log, 0.2)
+    log.flush()
+    log.close()
+    assert list(ResultLogReader(str(tmp_path)).column("c")) == [0.2]
+
+
+def test_write_error_at_exit_is_reported_not_raised(tmp_path, monkeypatch, capsys):
+    log = ResultLog(str(tmp_path), batch_size=1)
+
+    def failing_write_batch(rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(log, "_write_batch", failing_write_batch)
+    _search(log, 0.1)
+    log._close_at_exit()
+    assert "disk full" in capsys.readouterr().err
+
+
+def test_rows_between_uses_batch_times(tmp_path):
+    log = ResultLog(str(tmp_path), batch_size=1)
+    _search(log, 0.1)
+    log.flush()
+    middle = time.time()
+    time.sleep(0.01)
+    _search(log, 0.2)
+    _search(log, 0.3)
+    log.close()
+
+    reader = ResultLogReader(str(tmp_path))
+    assert reader.rows_between(0, middle) == slice(0, 1)
+    assert reader.rows_between(middle, time.time()) == slice(1, 3)
+    assert reader.rows_between(time.time() + 60, time.time() + 120) == slice(0, 0)
+
+
+def test_drake_histogram_sums_kiosks(tmp_path):
+    # Rookie guesses of 1 and 200 out of 10,000 planets, enthusiast guesses,
+    # a guess of no planets and one of more than 10,000 out of 10,000
+    paths = [str(tmp_path / "kiosk1"), str(tmp_path / "kiosk2")]
+    for path, guesses in zip(paths, ([0.0001, 0.02, 0], [0.0001, 0.02, 0.5, 3])):
+        log = ResultLog(path)
+        for c in guesses:
+            _search(log, c)
+        log.close()
+
+    counts, edges, below, above = drake_histogram(paths)
+    assert list(edges) == list(DRAKE_BINS)
+    assert sum(counts) == 5 and below == 1 and above == 1
+    assert counts[list(edges).index(0.0001)] == 2
+    assert counts[edges.searchsorted(0.02) - 1] == 2
+    assert counts[-1] == 1
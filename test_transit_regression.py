@@ -0,0 +1,110 @@
+import json
+import textwrap
+
+import pytest
+
+from transit_regression import main
+
+# Few planets keep the gate quick, the edge cases are always included
+FAST = ["--random", "0"]
+
+WRONG_ENGINE = """
+    from transit_regression import _vectorised_y_intensity, load_reference
+
+    _reference = load_reference()
+    get_t_times = _reference.get_t_times
+    get_x_positions = _reference.get_x_positions
+
+    def get_y_intensity(r_star, r_exo, x_positions, min_rel_intensity):
+        return _vectorised_y_intensity(r_star, r_exo, x_positions,
+                                       min_rel_intensity) + 1e-6
+"""
+
+SLOW_ENGINE = """
+    from transit_regression import load_reference
+
+    _reference = load_reference()
+    get_t_times = _reference.get_t_times
+    get_x_positions = _reference.get_x_positions
+
+    def get_y_intensity(r_star, r_exo, x_positions, min_rel_intensity):
+        for i in range(2):
+            _reference.get_y_intensity(r_star, r_exo, x_positions,
+                                       min_rel_intensity)
+        return _reference.get_y_intensity(r_star, r_exo, x_positions,
+                                          min_rel_intensity)
+"""
+
+# Vectorised on long transits, but three loops on short ones. The long far
+# orbit planets would hide this in a speedup taken over the total time.
+SHORT_SLOW_ENGINE = """
+    from transit_regression import _vectorised_y_intensity, load_reference
+
+    _reference = load_reference()
+    get_t_times = _reference.get_t_times
+    get_x_positions = _reference.get_x_positions
+
+    def get_y_intensity(r_star, r_exo, x_positions, min_rel_intensity):
+        if len(x_positions) > 10000:
+            return _vectorised_y_intensity(r_star, r_exo, x_positions,
+                                           min_rel_intensity)
+        for i in range(2):
+            _reference.get_y_intensity(r_star, r_exo, x_positions,
+                                       min_rel_intensity)
+        return _reference.get_y_intensity(r_star, r_exo, x_positions,
+                                          min_rel_intensity)
+"""
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    """Make the test engines importable by module name."""
+    for name, source in (("wrong_engine", WRONG_ENGINE),
+                         ("slow_engine", SLOW_ENGINE),
+                         ("short_slow_engine", SHORT_SLOW_ENGINE)):
+        (tmp_path / (name + ".py")).write_text(textwrap.dedent(source))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return tmp_path
+
+
+def _baseline(tmp_path, speedups):
+    """Write a baseline file and return the arguments that use it."""
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(
+        {name: {"worst_speedup": speedup, "median_speedup": speedup}
+         for name, speedup in speedups.items()}))
+    return ["--baseline", str(path)]
+
+
+def test_vectorised_engine_passes(tmp_path):
+    assert main(FAST + _baseline(tmp_path, {"vectorised": 1.0})) == 0
+
+
+def test_inaccurate_engine_fails(engines):
+    baseline = _baseline(engines, {"wrong_engine": 0.01})
+    assert main(FAST + baseline + ["--engine", "wrong_engine"]) == 1
+
+
+def test_slow_engine_fails(engines):
+    baseline = _baseline(engines, {"slow_engine": 1.0})
+    assert main(FAST + baseline + ["--engine", "slow_engine"]) == 1
+
+
+def test_engine_slow_on_short_transits_fails(engines):
+    baseline = _baseline(engines, {"short_slow_engine": 1.0})
+    assert main(FAST + baseline + ["--engine", "short_slow_engine"]) == 1
+
+
+def test_missing_baseline_fails(tmp_path):
+    assert main(FAST + _baseline(tmp_path, {})) == 1
+
+
+def test_failing_engine_is_not_stored_as_baseline(engines):
+    baseline = _baseline(engines, {})
+    assert main(FAST + baseline + ["--engine", "wrong_engine",
+                                   "--update-baseline"]) == 1
+    assert json.loads((engines / "baseline.json").read_text()) == {}
+
+    assert main(FAST + baseline + ["--engine", "vectorised",
+                                   "--update-baseline"]) == 0
+    assert "vectorised" in json.loads((engines / "baseline.json").read_text())
@@ -0,0 +1,308 @@
+""" Differential accuracy and performance gate for alternative transit engines.
+
+The loop-based get_t_times, get_x_positions and get_y_intensity in
+InteractiveSpaceAliens.py are the reference. An alternative engine is any
+module (or object) that provides functions with the same names and
+parameters. Each engine is run alongside the reference over randomised and
+edge-case planets, and the gate fails when:
+    - an intensity differs from the reference by more than the tolerance
+    - the detection decision for a planet changes
+    - the worst or median speedup over the reference, taken planet by planet,
+      falls below the stored baseline, or the engine has no stored baseline
+The baseline is only stored for engines that pass the accuracy checks.
+
+Usage:
+    python transit_regression.py                       # check built-in engines
+    python transit_regression.py --engine my_module    # check another engine
+    python transit_regression.py --update-baseline     # store new speedups
+"""
+
+import argparse
+import ast
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+from numpy import absolute, errstate, where
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXHIBIT_SCRIPT = os.path.join(HERE, "InteractiveSpaceAliens.py")
+BASELINE_FILE = os.path.join(HERE, "transit_baseline.json")
+ENGINE_FUNCTIONS = ("get_t_times", "get_x_positions", "get_y_intensity")
+
+
+######################  reference engine ###########################
+
+def load_reference():
+    """Load the functions and numeric constants of the exhibit script without
+    running its interactive main body.
+
+    Return:
+        SimpleNamespace: The exhibit's functions and constants (e.g. r_star)
+    """
+    with open(EXHIBIT_SCRIPT) as script:
+        tree = ast.parse(script.read(), EXHIBIT_SCRIPT)
+    keep = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            keep.append(node)
+        elif (isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant)
+              and type(node.value.value) in (int, float)):
+            keep.append(node)
+    namespace = {}
+    exec("from pylab import *", namespace)
+    exec(compile(ast.Module(keep, []), EXHIBIT_SCRIPT, "exec"), namespace)
+    return SimpleNamespace(**namespace)
+
+
+######################  alternative engines ###########################
+
+def _vectorised_y_intensity(r_star, r_exo, x_positions, min_rel_intensity):
+    """Calculate the same relative intensity as get_y_intensity using whole
+    array operations instead of a loop over each position.
+
+    Parameters:
+        r_star (flt): The radius of the star [km]
+        r_exo (flt): The radius of the exoplanet [km]
+        x_positions (flt array): Positions of the exoplanet [km]
+        min_rel_intensity (flt): Intensity when the exoplanet has full overlap
+    Return:
+        array: Intensity for each x_position of exoplanet as crosses its star
+    """
+    x_out = r_star + r_exo
+    x_in = r_star - r_exo
+    x = absolute(x_positions)
+    # Partial overlap is never selected when x_in == x_out, so ignore 0 / 0
+    with errstate(divide="ignore", invalid="ignore"):
+        partial = 1 - (((x - x_out) / (x_in - x_out)) * (1 - min_rel_intensity))
+    return where(x >= x_out, 1.0, where(x <= x_in, min_rel_intensity, partial))
+
+
+def _vectorised_engine(reference):
+    """Return the vectorised engine, reusing the reference functions that
+    already work on whole arrays.
+
+    Parameters:
+        reference (SimpleNamespace): The reference engine
+    Return:
+        SimpleNamespace: get_t_times, get_x_positions and get_y_intensity
+    """
+    return SimpleNamespace(get_t_times=reference.get_t_times,
+                           get_x_positions=reference.get_x_positions,
+                           get_y_intensity=_vectorised_y_intensity)
+
+
+BUILTIN_ENGINES = {"vectorised": _vectorised_engine}
+
+
+def load_engine(name, reference):
+    """Find an engine by name, either built in or an importable module.
+
+    Parameters:
+        name (str): Built-in engine name or module name
+        reference (SimpleNamespace): The reference engine
+    Return:
+        object: Provides get_t_times, get_x_positions and get_y_intensity
+    """
+    if name in BUILTIN_ENGINES:
+        return BUILTIN_ENGINES[name](reference)
+    engine = importlib.import_module(name)
+    missing = [f for f in ENGINE_FUNCTIONS if not hasattr(engine, f)]
+    if missing:
+        raise ValueError("engine %s is missing %s" % (name, ", ".join(missing)))
+    return engine
+
+
+######################  planets to check ###########################
+
+def get_cases(reference, n_random=20, seed=1000):
+    """Build the planets to check, as (description, user_size, user_dist).
+    Sizes are relative to Earth and distances relative to Earth and the sun.
+
+    Parameters:
+        reference (SimpleNamespace): The reference engine
+        n_random (int): Number of randomised planets
+        seed (int): Seed for the randomised planets
+    Return:
+        list: Tuples of (str, flt, flt)
+    """
+    near_star = reference.r_star / reference.r_Earth
+    cases = [
+        ("earth", 1, 1),
+        ("r_exo near r_star", near_star * 0.999, 1),
+        ("r_exo equal to r_star", near_star, 1),
+        ("tiny planet", 1e-3, 1),
+        ("zero size planet", 0, 1),
+        ("at the detection limit", 0.01 * near_star, 1),
+        ("very close to star", 1, 0.01),
+        ("very far from star", 1, 50),
+        ("jupiter far from star", 11, 10),
+    ]
+    rand = random.Random(seed)
+    for i in range(n_random):
+        cases.append(("random %d" % i, rand.uniform(0.1, 20),
+                      10 ** rand.uniform(-1.5, 1.2)))
+    return cases
+
+
+def _planet(reference, user_size, user_dist):
+    """Calculate the transit inputs of a planet using the exhibit's functions.
+
+    Parameters:
+        reference (SimpleNamespace): The reference engine
+        user_size (flt): Size of the exoplanet relative to Earth
+        user_dist (flt): Distance of the exoplanet relative to Earth
+    Return:
+        tuple: (r_exo, velocity_exo, transit_time, min_rel_intensity)
+    """
+    r_exo = reference.get_exo_dimension(reference.r_Earth, user_size)
+    dist_exo_star = reference.get_exo_dimension(reference.dist_Earth_sun, user_dist)
+    velocity_exo = reference.get_velocity_exo(
+        reference.velocity_Earth, reference.dist_Earth_sun, dist_exo_star)
+    transit_time = reference.get_transit_time(velocity_exo, reference.r_star)
+    min_rel_intensity = reference.get_min_rel_intensity(r_exo, reference.r_star)
+    return r_exo, velocity_exo, transit_time, min_rel_intensity
+
+
+######################  running the gate ###########################
+
+def run_transit(engine, r_star, r_exo, velocity_exo, transit_time, min_rel_intensity):
+    """Model a transit with an engine, as in step 9 of the exhibit.
+
+    Parameters:
+        engine (object): The engine to run
+        r_star (flt): The radius of the star [km]
+        r_exo (flt): The radius of the exoplanet [km]
+        velocity_exo (flt): The velocity of the exoplanet [km/s]
+        transit_time (flt): The time for the exoplanet to cross its star [s]
+        min_rel_intensity (flt): Intensity when the exoplanet has full overlap
+    Return:
+        tuple: (t_times, y_intensity, seconds taken)
+    """
+    start = time.perf_counter()
+    t_times = engine.get_t_times(transit_time, transit_time / 2)
+    x_positions = engine.get_x_positions(r_star, r_exo, velocity_exo, t_times)
+    y_intensity = engine.get_y_intensity(r_star, r_exo, x_positions, min_rel_intensity)
+    return t_times, y_intensity, time.perf_counter() - start
+
+
+def check_engine(reference, engine, cases, tolerance, repeats=5):
+    """Compare an engine with the reference over every planet.
+
+    Parameters:
+        reference (SimpleNamespace): The reference engine
+        engine (object): The alternative engine
+        cases (list): Planets from get_cases
+        tolerance (flt): Largest allowed absolute intensity error
+        repeats (int): Timing runs per planet, the fastest is kept
+    Return:
+        tuple: (list of failure messages, max intensity error, list of
+            (description, number of samples, speedup) for each planet)
+    """
+    failures = []
+    max_error = 0.0
+    speedups = []
+    for description, user_size, user_dist in cases:
+        r_exo, velocity_exo, transit_time, min_rel_intensity = _planet(
+            reference, user_size, user_dist)
+        args = (reference.r_star, r_exo, velocity_exo, transit_time, min_rel_intensity)
+        ref_runs = [run_transit(reference, *args) for i in range(repeats)]
+        alt_runs = [run_transit(engine, *args) for i in range(repeats)]
+        ref_t, ref_y = ref_runs[0][:2]
+        alt_t, alt_y = alt_runs[0][:2]
+        # Speedups are kept per planet so long transits can't hide slow short ones
+        alt_seconds = min(run[2] for run in alt_runs)
+        speedup = (min(run[2] for run in ref_runs) / alt_seconds
+                   if alt_seconds else float("inf"))
+        speedups.append((description, len(ref_y), speedup))
+
+        if len(alt_t) != len(ref_t) or len(alt_y) != len(ref_y):
+            failures.append("%s: %d samples, reference has %d"
+                            % (description, len(alt_y), len(ref_y)))
+            continue
+        error = float(absolute(alt_y - ref_y).max()) if len(ref_y) else 0.0
+        max_error = max(max_error, error)
+        if not error <= tolerance:
+            failures.append("%s: intensity error %g exceeds %g"
+                            % (description, error, tolerance))
+        if len(ref_y) and (bool(reference.get_detection(ref_y.min()))
+                           != bool(reference.get_detection(alt_y.min()))):
+            failures.append("%s: detection decision changed" % description)
+
+    return failures, max_error, speedups
+
+
+def main(argv=None):
+    """Run the gate and return the exit status (0 pass, 1 fail)."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0].strip())
+    parser.add_argument("--engine", action="append",
+                        help="engine to check (default: all built-in engines)")
+    parser.add_argument("--tolerance", type=float, default=1e-12,
+                        help="largest allowed absolute intensity error")
+    parser.add_argument("--slack", type=float, default=0.25,
+                        help="allowed fraction below the baseline speedup")
+    parser.add_argument("--random", type=int, default=20,
+                        help="number of randomised planets")
+    parser.add_argument("--seed", type=int, default=1000)
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="file of stored speedups for each engine")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the measured speedups as the new baseline")
+    args = parser.parse_args(argv)
+
+    reference = load_reference()
+    cases = get_cases(reference, args.random, args.seed)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    failed = False
+    for name in args.engine or sorted(BUILTIN_ENGINES):
+        failures, max_error, speedups = check_engine(
+            reference, load_engine(name, reference), cases, args.tolerance)
+        measured = {
+            "worst_speedup": min(speedup for *planet, speedup in speedups),
+            "median_speedup": statistics.median(
+                speedup for *planet, speedup in speedups),
+        }
+        print("%s: max intensity error %g, worst speedup %.1fx, median "
+              "speedup %.1fx over %d planets"
+              % (name, max_error, measured["worst_speedup"],
+                 measured["median_speedup"], len(cases)))
+        for description, samples, speedup in speedups:
+            print("  %-24s %8d samples  %7.1fx" % (description, samples, speedup))
+
+        if args.update_baseline:
+            if failures:
+                failures.append("baseline not updated for a failing engine")
+            else:
+                baseline[name] = {key: round(value, 2)
+                                  for key, value in measured.items()}
+        elif name not in baseline:
+            failures.append("no stored baseline speedup, "
+                            "run with --update-baseline to store one")
+        else:
+            for key, value in sorted(measured.items()):
+                floor = baseline[name][key] * (1 - args.slack)
+                if value < floor:
+                    failures.append("%s %.1fx is below the baseline floor %.1fx"
+                                    % (key.replace("_", " "), value, floor))
+        for failure in failures:
+            print("  FAIL %s" % failure)
+        failed = failed or bool(failures)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+            file.write("\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())